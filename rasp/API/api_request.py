@@ -1,4 +1,16 @@
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+# Module-level session: keep-alive connection reuse means each tomato
+# skips the TCP+TLS handshake (~100-300 ms per POST)
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
 
 def send_prediction_to_api(prediction_data, api_endpoint):
     """
@@ -12,7 +24,7 @@ def send_prediction_to_api(prediction_data, api_endpoint):
         bool: True if successful
     """
     try:
-        response = requests.post(
+        response = _session.post(
             api_endpoint,
             json=prediction_data,
             headers={"Content-Type": "application/json"},
@@ -1,25 +1,33 @@
 import serial
-import json
+import orjson
 
 class ArduinoReader:
     def __init__(self, 
                  port='/dev/ttyUSB0', # port
                  baud=115200, # baud rate
                  ):
-        self.ser = serial.Serial(port, baud, timeout=1)
-    
+        # Short timeout: readline() blocks in pyserial's C layer and
+        # returns b'' on timeout, instead of busy-polling in_waiting
+        self.ser = serial.Serial(port, baud, timeout=0.01)
+
     def read_ir_signal(self):
-        """Blocks until tomato detected"""
-        if self.ser.in_waiting:
-            line = self.ser.readline().decode('utf-8').strip()
-            try:
-                data = json.loads(line)
-                return data  # {"ir_detected": true, "timestamp": "..."}
-            except Exception as e:
-                print(e)
-                return None
-    
+        """Blocks briefly; returns None when no complete line arrived"""
+        line = self.ser.readline()
+        if not line.strip():
+            return None
+        try:
+            data = orjson.loads(line)
+            return data  # {"ir_detected": true, "timestamp": "..."}
+        except Exception as e:
+            print(e)
+            return None
+
+    def drain(self):
+        """Discard buffered lines so a stale trigger isn't serviced"""
+        while self.ser.in_waiting:
+            self.ser.readline()
+
     def send_servo_command(self, servo_id, angle):
         """Tell ESP32 to move servo"""
-        cmd = json.dumps({"servo": servo_id, "angle": angle})
-        self.ser.write(cmd.encode() + b'\n')
\ No newline at end of file
+        cmd = orjson.dumps({"servo": servo_id, "angle": angle})
+        self.ser.write(cmd + b'\n')
\ No newline at end of file
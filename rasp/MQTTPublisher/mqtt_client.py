@@ -1,5 +1,5 @@
 import paho.mqtt.client as mqtt
-import json
+import orjson
 
 class MQTTPublisher:
     def __init__(self, broker_url, broker_port, topic="tomato/predictions"):
@@ -7,7 +7,14 @@ class MQTTPublisher:
         self.client.on_connect = self.on_connect
         self.client.on_disconnect = self.on_disconnect
         self.client.on_publish = self.on_publish
-        
+
+        # Fire-and-forget telemetry tuning: allow a burst of in-flight
+        # messages and cap reconnect backoff so a network blip doesn't
+        # stall publishing for long
+        self.client.max_inflight_messages_set(20)
+        self.client.max_queued_messages_set(100)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=5)
+
         self.broker_url = broker_url
         self.broker_port = broker_port
         self.topic = topic
@@ -46,9 +53,11 @@ class MQTTPublisher:
             }
         """
         try:
-            payload = json.dumps(prediction_data)
-            
-            result = self.client.publish(self.topic, payload)
+            # orjson serializes straight to bytes, which paho accepts -
+            # skips both the pure-Python encoder and the .encode() step
+            payload = orjson.dumps(prediction_data)
+
+            result = self.client.publish(self.topic, payload, qos=0, retain=False)
             
             if result[0] == 0:
                 print(f"Published to {self.topic}: {prediction_data}")
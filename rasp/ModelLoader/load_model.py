@@ -1,5 +1,6 @@
 from ultralytics import YOLO
 from huggingface_hub import hf_hub_download
+import numpy as np
 import os
 
 def load_tomato_model(model_name="yolov8n", cache_dir="/tmp/hf_models"):
@@ -35,13 +36,34 @@ def load_tomato_model(model_name="yolov8n", cache_dir="/tmp/hf_models"):
         )
         
         print(f"✓ Downloaded from HF: {model_path}")
-        
-        # Load into YOLO
-        model = YOLO(model_path)
-        
-        model_size = os.path.getsize(model_path) / (1024 * 1024)
-        print(f"Loaded custom model ({model_size:.1f} MB)")
-        
+
+        # Prefer an NCNN export - ARM-optimized inference is several times
+        # faster on the Pi than running the .pt through PyTorch on CPU
+        ncnn_path = os.path.join(os.path.dirname(model_path), "best_ncnn_model")
+
+        if not os.path.isdir(ncnn_path):
+            try:
+                print("Exporting model to NCNN (one-time)...")
+                YOLO(model_path).export(format="ncnn", imgsz=320)
+            except Exception as e:
+                print(f"NCNN export failed, falling back to PyTorch: {e}")
+
+        if os.path.isdir(ncnn_path):
+            model = YOLO(ncnn_path, task="detect")
+            print("Loaded NCNN-exported model")
+        else:
+            model = YOLO(model_path)
+            model_size = os.path.getsize(model_path) / (1024 * 1024)
+            print(f"Loaded custom model ({model_size:.1f} MB)")
+
+        # Warm up: the first predict() triggers lazy graph construction
+        # and buffer allocation (1-3 s on a Pi) - pay it at startup, not
+        # on the first tomato. A few passes stabilize kernel selection.
+        print("Warming up model...")
+        dummy = np.zeros((320, 320, 3), np.uint8)
+        for _ in range(3):
+            model.predict(dummy, verbose=False, imgsz=320)
+
         return model
     
     except Exception as e:
@@ -1,10 +1,38 @@
-import cv2
-
-def preprocess_tomato_image(frame, target_size=320):
-    """
-    Resize Logitech C270 1280x720 to YOLO input size
-    """
-    # YOLO input: 320x320, 416x416, 640x640, 1280x1280
-    resized = cv2.resize(frame, (target_size, target_size), interpolation=cv2.INTER_LINEAR)
-    normalized = resized.astype('float32') / 255.0
-    return normalized
\ No newline at end of file
+import cv2
+import numpy as np
+
+# Reused destination buffer so resize doesn't hit the allocator per
+# frame; safe because main.py consumes the result before the next capture
+_dst = None
+
+# Offload the resize to OpenCL where available (x86 edge boxes, Pi 5
+# with a capable driver); on plain ARM this stays False and the CPU
+# path below is used unchanged
+_use_opencl = False
+try:
+    if cv2.ocl.haveOpenCL():
+        cv2.ocl.setUseOpenCL(True)
+        _use_opencl = cv2.ocl.useOpenCL()
+except cv2.error:
+    pass
+
+def preprocess_tomato_image(frame, target_size=320):
+    """
+    Resize Logitech C270 1280x720 to YOLO input size
+
+    Returns uint8 BGR - Ultralytics normalizes internally, so casting to
+    float32/255 here would just double the bytes pushed through Python
+    """
+    global _dst
+    if _dst is None or _dst.shape[0] != target_size:
+        _dst = np.empty((target_size, target_size, 3), dtype=np.uint8)
+
+    # YOLO input: 320x320, 416x416, 640x640, 1280x1280
+    # INTER_AREA is faster and alias-free for 1280->320 downscaling
+    if _use_opencl:
+        umat = cv2.UMat(frame)
+        resized = cv2.resize(umat, (target_size, target_size), interpolation=cv2.INTER_AREA)
+        return resized.get()
+
+    cv2.resize(frame, (target_size, target_size), dst=_dst, interpolation=cv2.INTER_AREA)
+    return _dst
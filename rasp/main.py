@@ -1,121 +1,222 @@
-import cv2
-import json
-import time
-import os
-from datetime import datetime
-import numpy as np
-
-from ArduinoReader.arduino_reader import ArduinoReader
-from CameraHandler.camera_handler import CameraHandler
-from ModelLoader.load_model import load_tomato_model
-from ModelLoader.preprocess import preprocess_tomato_image
-from MQTTPublisher import MQTTPublisher
-from config import MQTT_CONFIG, ARDUINO_CONFIG, TOMATO_CLASSES, SERVO_ACTIONS, MODEL_CONFIG, DEVICE_ID, API_ENDPOINT
-from API.api_request import send_prediction_to_api
-
-def get_servo_action(class_idx):
-    """Map class to servo action"""
-    return SERVO_ACTIONS.get(class_idx, {"servo": 1, "angle": 180})
-
-def main():
-    print("🍅 Tomato Detection System Starting...")
-    
-    # Initialize components
-    print("Initializing Arduino reader...")
-    arduino = ArduinoReader(**ARDUINO_CONFIG)
-    
-    print("Initializing camera...")
-    camera = CameraHandler(device=0)
-    
-    # Load model
-    print("Loading YOLO model...")
-    print(f"Loading custom model from HF: {MODEL_CONFIG['model_name']}")
-    model = load_tomato_model(model_name=MODEL_CONFIG["model_name"])
-    
-    if model is None:
-        print("Failed to load model. Exiting.")
-        return
-    
-    print("Connecting to MQTT broker...")
-    mqtt_pub = MQTTPublisher(**MQTT_CONFIG)
-    if not mqtt_pub.connect():
-        return
-    
-    time.sleep(1)  # Give time to connect
-    
-    # Main loop
-    tomato_counter = 0    
-    try:
-        while True:
-            # Step 1: Wait for IR signal from Arduino
-            ir_data = arduino.read_ir_signal()
-            if not ir_data:
-                time.sleep(0.1)
-                continue
-            
-            print(f"\nTomato #{tomato_counter + 1} detected by IR sensor")
-            
-            # Step 2: Capture image
-            image = camera.capture()
-            #image = camera.capture_multiple()
-            if image is None:
-                print("Failed to capture frame")
-                continue
-            
-            # Step 3: Preprocess
-            preprocessed = preprocess_tomato_image(image)
-            
-            # Step 4: Inference
-            y_pred = model.predict(preprocessed)
-            class_idx = int(np.argmax(y_pred))
-            confidence = float(np.max(y_pred))
-            class_name = TOMATO_CLASSES.get(class_idx, "-1")
-            
-            # Step 5: Create prediction payload
-            timestamp = datetime.utcnow().isoformat() + "Z"
-            tomato_id = f"tm_{int(time.time())}_{tomato_counter:03d}"
-            
-            servo_action = get_servo_action(class_idx)
-            
-            prediction_payload = {
-                "tomato_id": tomato_id,
-                "device_id": DEVICE_ID,
-                "class": class_idx,
-                "class_name": class_name,
-                "confidence": confidence,
-                "rasp_timestamp": timestamp,
-            }
-            
-            # Step 6: Publish to MQTT
-            mqtt_pub.publish_message(prediction_payload)
-            
-            # or, directly to API
-            # send_prediction_to_api(prediction_payload, API_ENDPOINT)
-            
-            # Step 7: Control servo
-            print(f"🎯 Class: {class_name} | Confidence: {confidence:.2%} | Servo: Box {class_idx + 1}")
-            arduino.send_servo_command(servo_action["servo"], servo_action["angle"])
-            
-            # Step 9: Save and delete temp image (for several days in Trash)
-            # temp_image_path = f"/tmp/{tomato_id}.jpg"
-            # cv2.imwrite(temp_image_path, image)
-            # print(f"📸 Temp image saved: {temp_image_path}")
-            
-            # time.sleep(0.1)
-            # try:
-            #     os.remove(temp_image_path)
-            #     print(f"🗑️  Temp image deleted: {temp_image_path}")
-            # except Exception as e:
-            #     print(f"⚠️  Failed to delete image: {e}")
-            
-            tomato_counter += 1
-            time.sleep(1)
-    
-    except KeyboardInterrupt:
-        print("\n\n⏹ Shutting down...")
-    finally:
-        mqtt_pub.disconnect()
-        camera.release()
-
-if __name__ == "__main__":
-    main()
+import cv2
+import concurrent.futures
+import itertools
+import json
+import queue
+import threading
+import time
+import os
+import numpy as np
+
+from ArduinoReader.arduino_reader import ArduinoReader
+from CameraHandler.camera_handler import CameraHandler
+from ModelLoader.load_model import load_tomato_model
+from ModelLoader.preprocess import preprocess_tomato_image
+from MQTTPublisher import MQTTPublisher
+from config import MQTT_CONFIG, ARDUINO_CONFIG, TOMATO_CLASSES, SERVO_ACTIONS, MODEL_CONFIG, DEVICE_ID, API_ENDPOINT
+from API.api_request import send_prediction_to_api
+
+# Bounded queues connecting the pipeline stages; small maxsize gives
+# back-pressure so a slow stage drops stale work instead of piling it up
+QUEUE_SIZE = 2
+
+# Stage affinity on the Pi's 4 cores: YOLO gets cores 2-3 to itself,
+# the lightweight I/O stages share cores 0-1
+INFER_CORES = {2, 3}
+IO_CORES = {0, 1}
+
+def set_thread_affinity(cores):
+    """Pin the calling thread to the given CPU cores (best effort)"""
+    try:
+        os.sched_setaffinity(0, cores)
+    except (AttributeError, OSError):
+        pass  # Non-Linux, or fewer cores than requested
+
+def get_servo_action(class_idx):
+    """Map class to servo action"""
+    return SERVO_ACTIONS.get(class_idx, {"servo": 1, "angle": 180})
+
+def _put_with_shutdown(q, item, shutdown):
+    """Put on a bounded queue, giving up if shutdown is requested"""
+    while not shutdown.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _put_latest(q, item):
+    """Put on the bounded LIFO frame queue, evicting an entry when full
+
+    Never blocks: when inference falls behind, old frames are silently
+    overwritten so YOLO always pops a near-now frame"""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+def ir_worker(arduino, q_trigger, shutdown):
+    """Stage 1: Wait for IR signals from Arduino"""
+    set_thread_affinity(IO_CORES)
+    while not shutdown.is_set():
+        # read_ir_signal blocks on the serial timeout itself, so no
+        # extra sleep here - triggers are picked up within ~10 ms
+        ir_data = arduino.read_ir_signal()
+        if not ir_data:
+            continue
+        _put_with_shutdown(q_trigger, ir_data, shutdown)
+
+def camera_worker(camera, q_trigger, q_frame, counter, shutdown):
+    """Stage 2: Capture a frame per IR trigger"""
+    set_thread_affinity(IO_CORES)
+    while not shutdown.is_set():
+        try:
+            q_trigger.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        tomato_number = next(counter)
+        print(f"\nTomato #{tomato_number + 1} detected by IR sensor")
+
+        image = camera.capture()
+        #image = camera.capture_multiple()
+        if image is None:
+            print("Failed to capture frame")
+            continue
+
+        _put_latest(q_frame, (tomato_number, image))
+
+def inference_worker(model, q_frame, q_pred, shutdown):
+    """Stage 3: Preprocess + YOLO inference"""
+    set_thread_affinity(INFER_CORES)
+    while not shutdown.is_set():
+        try:
+            tomato_number, image = q_frame.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        preprocessed = preprocess_tomato_image(image)
+
+        y_pred = model.predict(preprocessed)
+        class_idx = int(np.argmax(y_pred))
+        confidence = float(np.max(y_pred))
+        class_name = TOMATO_CLASSES.get(class_idx, "-1")
+
+        # One clock read per tomato; strftime on a struct_time is much
+        # cheaper than building datetime objects
+        epoch_s = time.time_ns() // 1_000_000_000
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch_s))
+        tomato_id = f"tm_{epoch_s}_{tomato_number:03d}"
+
+        prediction_payload = {
+            "tomato_id": tomato_id,
+            "device_id": DEVICE_ID,
+            "class": class_idx,
+            "class_name": class_name,
+            "confidence": confidence,
+            "rasp_timestamp": timestamp,
+        }
+
+        _put_with_shutdown(q_pred, prediction_payload, shutdown)
+
+def publish_worker(mqtt_pub, arduino, q_pred, io_pool, shutdown):
+    """Stage 4: Publish prediction and fire the servo"""
+    set_thread_affinity(IO_CORES)
+    while not shutdown.is_set():
+        try:
+            prediction_payload = q_pred.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        class_idx = prediction_payload["class"]
+        class_name = prediction_payload["class_name"]
+        confidence = prediction_payload["confidence"]
+        servo_action = get_servo_action(class_idx)
+
+        # Fire-and-forget: network I/O runs on the io pool so the servo
+        # command isn't delayed by a slow broker or API
+        io_pool.submit(mqtt_pub.publish_message, prediction_payload)
+
+        # or, directly to API
+        # io_pool.submit(send_prediction_to_api, prediction_payload, API_ENDPOINT)
+
+        print(f"🎯 Class: {class_name} | Confidence: {confidence:.2%} | Servo: Box {class_idx + 1}")
+        arduino.send_servo_command(servo_action["servo"], servo_action["angle"])
+
+def main():
+    print("🍅 Tomato Detection System Starting...")
+
+    # Raise process priority so background daemons don't preempt the
+    # pipeline (needs CAP_SYS_NICE; harmless to skip without it)
+    try:
+        os.nice(-10)
+    except (AttributeError, OSError, PermissionError):
+        print("Could not raise process priority (run with CAP_SYS_NICE)")
+
+    # Initialize components
+    print("Initializing Arduino reader...")
+    arduino = ArduinoReader(**ARDUINO_CONFIG)
+
+    print("Initializing camera...")
+    camera = CameraHandler(device=0)
+
+    # Load model
+    print("Loading YOLO model...")
+    print(f"Loading custom model from HF: {MODEL_CONFIG['model_name']}")
+    model = load_tomato_model(model_name=MODEL_CONFIG["model_name"])
+
+    if model is None:
+        print("Failed to load model. Exiting.")
+        return
+
+    print("Connecting to MQTT broker...")
+    mqtt_pub = MQTTPublisher(**MQTT_CONFIG)
+    if not mqtt_pub.connect():
+        return
+
+    time.sleep(1)  # Give time to connect
+
+    # Pipeline: IR -> capture -> inference -> publish, each stage in its
+    # own thread so throughput is bounded by the slowest stage (YOLO)
+    # instead of the sum of all stages
+    q_trigger = queue.Queue(maxsize=QUEUE_SIZE)
+    # LIFO so the inference thread always pops the most recent frame
+    # when it falls behind the camera
+    q_frame = queue.LifoQueue(maxsize=QUEUE_SIZE)
+    q_pred = queue.Queue(maxsize=QUEUE_SIZE)
+    shutdown = threading.Event()
+    tomato_counter = itertools.count()
+    io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="io")
+
+    workers = [
+        threading.Thread(target=ir_worker, args=(arduino, q_trigger, shutdown), name="T_IR", daemon=True),
+        threading.Thread(target=camera_worker, args=(camera, q_trigger, q_frame, tomato_counter, shutdown), name="T_CAM", daemon=True),
+        threading.Thread(target=inference_worker, args=(model, q_frame, q_pred, shutdown), name="T_INFER", daemon=True),
+        threading.Thread(target=publish_worker, args=(mqtt_pub, arduino, q_pred, io_pool, shutdown), name="T_PUB", daemon=True),
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    try:
+        while True:
+            time.sleep(1)
+
+    except KeyboardInterrupt:
+        print("\n\n⏹ Shutting down...")
+    finally:
+        shutdown.set()
+        for worker in workers:
+            worker.join(timeout=2)
+        io_pool.shutdown(wait=True)  # Flush any in-flight publishes
+        mqtt_pub.disconnect()
+        camera.release()
+
+if __name__ == "__main__":
+    main()
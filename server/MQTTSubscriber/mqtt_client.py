@@ -1,7 +1,19 @@
 import paho.mqtt.client as mqtt
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import json
 
+# Module-level session: keep-alive connection reuse means each forward
+# skips the TCP+TLS handshake to the API
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
 class MQTTSubscriber:
     def __init__(self, broker_host, broker_port, api_endpoint, topic="tomato/predictions"):
         """
@@ -43,25 +55,30 @@ class MQTTSubscriber:
     def on_message(self, client, userdata, msg):
         """Handle incoming MQTT messages"""
         try:
-            # Parse MQTT payload
-            payload = json.loads(msg.payload.decode())
+            # Parse only for the log line - the API gets the raw bytes
+            payload = json.loads(msg.payload)
             print(f"\nReceived: {payload['tomato_id']}")
             print(f"Class: {payload['class_name']} ({payload['confidence']:.2%})")
-            
+
             # Forward to HF Spaces API
-            # self.forward_to_api(payload) # pakai API buatan Jason
-        
+            # self.forward_to_api(msg.payload) # pakai API buatan Jason
+
         except json.JSONDecodeError:
             print(f"Invalid JSON received: {msg.payload}")
         except Exception as e:
             print(f"Error processing message: {e}")
-    
-    def forward_to_api(self, prediction_data):
-        """Send prediction to HF Spaces API"""
+
+    def forward_to_api(self, payload_bytes):
+        """
+        Send prediction to HF Spaces API
+
+        Takes the raw JSON bytes from MQTT so the payload is not parsed
+        and re-serialized just to pass it along unchanged
+        """
         try:
-            response = requests.post(
+            response = _session.post(
                 self.api_endpoint,
-                json=prediction_data,
+                data=payload_bytes,
                 headers={"Content-Type": "application/json"},
                 timeout=10
             )